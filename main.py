@@ -1,9 +1,23 @@
+import atexit  # Импорт модуля atexit для сохранения несохраненных записей при завершении программы
 import json  # Импорт модуля json для работы с JSON
-import os  # Импорт модуля os для работы с файловой системой (проверки существует ли искомый файл. Это помогает избежать ошибок, если файл не существует, и предотвращает исключение.)
-from typing import List, Dict, Any
+import operator  # Импорт модуля operator для быстрого извлечения полей записи
+import os  # Импорт модуля os для работы с файловой системой (время изменения файла и сброс данных на диск)
+import sys  # Импорт модуля sys для вывода в консоль одной операцией записи
+from typing import List, Dict, Any, Optional, Set, Tuple, Callable, BinaryIO
+
+try:
+    import orjson  # Быстрая библиотека для работы с JSON, если она установлена
+except ImportError:
+    orjson = None  # Без нее используется стандартный модуль json
+
+_INCOME = sys.intern('Доход')  # Единственные экземпляры строк категорий, чтобы сравнение сводилось к проверке ссылок
+_EXPENSE = sys.intern('Расход')
+_CATEGORIES = {_INCOME: _INCOME, _EXPENSE: _EXPENSE}
 
 
 class DataFormat:
+    __slots__ = ('date', 'category', 'amount', 'description')  # Фиксированный набор полей вместо словаря __dict__ у каждого экземпляра
+
     def __init__(self, date: str, category: str, amount: float, description: str = "") -> None:
         """
         Класс определяющий формат данных.
@@ -21,7 +35,7 @@ class DataFormat:
 
     def dictionary(self) -> Dict[str, Any]:
         """
-         Метод преобразования данных в словарь.
+         Метод преобразования данных в словарь. Используется только при записи в файл.
 
         :return:
             Dict[str, Any]: Словарь с данными.
@@ -35,6 +49,8 @@ class DataFormat:
 
 
 class DataControl:
+    INDEXED_FIELDS = ('date', 'category')  # Поля, по которым строится индекс для поиска
+
     def __init__(self, filename: str) -> None:
         """
         Класс по управлению данными.
@@ -42,72 +58,270 @@ class DataControl:
         :param filename: Имя файла для хранения данных.
         """
         self.filename = filename
-
-    def read_file(self) -> List[Dict[str, Any]]:
+        self._file: Optional[BinaryIO] = None  # Открытый файл с данными, переиспользуется между операциями
+        self._writable = False  # Файл открыт на запись (до первой записи он открыт только на чтение)
+        self._cache: Optional[List[DataFormat]] = None  # Записи, уже прочитанные из файла
+        self._mtime: Optional[int] = None  # Время изменения файла на момент чтения, чтобы заметить правки извне
+        self._index: Dict[Tuple[str, Any], Set[int]] = {}  # Индекс: (поле, значение) -> номера записей с этим значением
+        self._income = 0  # Сумма доходов по всем записям (как и sum(), начинается с 0)
+        self._expenses = 0  # Сумма расходов по всем записям
+        self._dirty = False  # Есть изменения в памяти, которые еще не записаны в файл
+        atexit.register(self.close)
+
+    def read_file(self) -> List[DataFormat]:
         """
         Метод для чтения данных из файла.
+        Файл разбирается только при первом обращении или если он изменился с момента последнего чтения,
+        в остальных случаях возвращается список из памяти.
 
         :return:
-            List[Dict[str, Any]]: Список словарей с данными.
+            List[DataFormat]: Список записей.
+        """
+
+        if self._dirty:  # Несохраненные изменения нельзя терять при перечитывании файла
+            return self._cache
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:  # Файла нет: записей нет, файл будет создан при первом сохранении
+            self._close_file()
+            self._cache = []
+            self._mtime = None
+            self._build_index(self._cache)
+            return self._cache
+        if self._is_replaced(stat):  # Файл еще не открыт или заменен на диске (например, сохранен редактором)
+            self._open_file('rb')
+            self._mtime = None
+        mtime = stat.st_mtime_ns
+        if self._cache is not None and mtime == self._mtime:  # Файл не менялся, повторно читать его не нужно
+            return self._cache
+        self._file.seek(0)  # Чтение всегда с начала уже открытого файла
+        data = self._file.read()
+        if data:
+            items = orjson.loads(data) if orjson else json.loads(data)  # Загрузка данных из файла JSON
+            # Записи хранятся в памяти как экземпляры DataFormat, лишние поля, добавленные в файл вручную, не учитываются
+            self._cache = [DataFormat(item['date'], item['category'], item['amount'], item.get('description', ''))
+                           for item in items]
+        else:  # Новый пустой файл
+            self._cache = []
+        self._mtime = mtime
+        self._build_index(self._cache)
+        return self._cache
+
+    def _is_replaced(self, stat: os.stat_result) -> bool:
+        """
+        Метод для проверки, указывает ли открытый файл на тот же файл, что и путь self.filename.
+
+        :param stat: Результат os.stat для self.filename.
+        :return:
+            bool: True, если файл не открыт или на диске по этому пути теперь другой файл.
         """
+        if self._file is None:
+            return True
+        opened = os.fstat(self._file.fileno())
+        return (opened.st_dev, opened.st_ino) != (stat.st_dev, stat.st_ino)
 
-        if os.path.exists(self.filename):  # Проверка наличия файла os.path: Это модуль в стандартной библиотеке Python, который предоставляет функции для работы с путями к файлам и директориям в файловой системе.exists: Это функция модуля os.path, которая проверяет, существует ли файл или директория по указанному пути.
-            with open(self.filename, 'r') as file:  # Открытие файла для чтения 'r' означает режим "чтение" (read), что позволяет только читать данные из файла. file объект используемый для доступа к информации из файла
-                return json.load(file)  # Загрузка данных из файла JSON и возврат результата в формате Python
-        else:
-            return []
+    def _open_file(self, mode: str) -> None:
+        """
+        Метод для открытия файла с данными вместо ранее открытого.
+
+        :param mode: Режим открытия: 'rb' - только чтение, 'a+b' - чтение и запись (создает файл, если его нет).
+        """
+        self._close_file()
+        self._file = open(self.filename, mode)
+        self._writable = mode != 'rb'
+
+    def _close_file(self) -> None:
+        """
+        Метод для закрытия открытого файла без сохранения изменений.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writable = False
+
+    def _build_index(self, records: List[DataFormat]) -> None:
+        """
+        Метод для построения индекса и подсчета итогов по всем записям.
+
+        :param records: Список записей.
+        """
+        self._index = {}
+        self._income = self._expenses = 0
+        for position, record in enumerate(records):
+            self._index_record(position, record)
+            self._count_amount(record)
+
+    def _index_record(self, position: int, record: DataFormat) -> None:
+        """
+        Метод для добавления записи в индекс.
+        Категория записи заменяется на общий экземпляр строки.
+
+        :param position: Номер записи в списке.
+        :param record: Экземпляр класса DataFormat.
+        """
+        record.category = _CATEGORIES.get(record.category, record.category)
+        for field in self.INDEXED_FIELDS:
+            self._index.setdefault((field, getattr(record, field)), set()).add(position)
+
+    def _unindex_record(self, position: int, record: DataFormat) -> None:
+        """
+        Метод для удаления записи из индекса.
+
+        :param position: Номер записи в списке.
+        :param record: Экземпляр класса DataFormat.
+        """
+        for field in self.INDEXED_FIELDS:
+            key = (field, getattr(record, field))
+            positions = self._index.get(key)
+            if positions is not None:
+                positions.discard(position)
+                if not positions:  # Пустые множества не храним
+                    del self._index[key]
+
+    def _get_cached(self) -> List[DataFormat]:
+        """
+        Метод для получения записей перед их изменением.
+
+        :return:
+            List[DataFormat]: Список записей из памяти.
+        """
+        if self._cache is None:
+            return self.read_file()
+        return self._cache
+
+    def _count_amount(self, record: DataFormat) -> None:
+        """
+        Метод для прибавления суммы записи к итогам.
+
+        :param record: Экземпляр класса DataFormat.
+        """
+        category = record.category
+        if category == _INCOME:
+            self._income += record.amount
+        elif category == _EXPENSE:
+            self._expenses += record.amount
+
+    def _recount_totals(self) -> None:
+        """
+        Метод для пересчета итогов по всем записям.
+        Вычитание старой суммы накапливало бы ошибку округления, поэтому итоги считаются заново.
+        """
+        self._income = self._expenses = 0
+        for record in self._cache:
+            self._count_amount(record)
+
+    def totals(self) -> Tuple[float, float]:
+        """
+        Метод для получения итогов без перебора записей.
 
-    def save_records(self, records: List[Dict[str, Any]]) -> None:
+        :return:
+            Tuple[float, float]: Сумма доходов и сумма расходов.
+        """
+        self.read_file()  # Итоги пересчитываются, только если файл изменился
+        return self._income, self._expenses
+
+    def save_records(self, records: List[DataFormat]) -> None:
         """
         Метод для сохранения данных в файл.
 
-        :param records: Список словарей с данными.
+        :param records: Список записей.
         """
-        with open(self.filename, 'w') as file:  # Открытие файла для записи, из-за команды w старое содержимое зааменится новым
-            json.dump(records, file,
-                      indent=4)  # Сериализация данных в JSON и запись в файл с отступами для удобства чтения
+        if records is not self._cache:  # Передан новый список, индекс нужно построить заново
+            self._cache = records
+            self._build_index(records)
+        if orjson:
+            # Сериализация данных в JSON с отступами для удобства чтения, записи преобразуются в словари только здесь
+            data = orjson.dumps(records, default=DataFormat.dictionary, option=orjson.OPT_INDENT_2)
+        else:
+            data = json.dumps(records, default=DataFormat.dictionary, indent=2, ensure_ascii=False).encode('utf-8')  # Тот же формат, что и у orjson
+        try:
+            replaced = self._is_replaced(os.stat(self.filename))
+        except FileNotFoundError:  # Файл удален или еще не создан
+            replaced = True
+        if replaced or not self._writable:  # Запись всегда идет в файл, который сейчас лежит по пути self.filename
+            self._open_file('a+b')
+        self._file.seek(0)
+        self._file.truncate()  # Старое содержимое заменится новым
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._mtime = os.fstat(self._file.fileno()).st_mtime_ns
+        self._dirty = False
+
+    def flush(self) -> None:
+        """
+        Метод для записи накопленных изменений в файл.
+        """
+        if self._dirty:
+            self.save_records(self._cache)
+
+    def close(self) -> None:
+        """
+        Метод для сохранения изменений и закрытия файла с данными.
+        """
+        self.flush()
+        self._close_file()
 
     def add_record(self, record: DataFormat) -> None:
         """
         Метод добавления записи.
+        Запись попадает в файл при вызове flush() или при завершении работы.
 
         :param record: Экземпляр класса DataFormat.
         """
-        records = self.read_file()
-        records.append(record.dictionary())  # Добавление новой записи преобразуя ее в словарь
-        self.save_records(records)
+        records = self._get_cached()
+        records.append(record)  # Добавление новой записи
+        self._index_record(len(records) - 1, records[-1])
+        self._count_amount(records[-1])
+        self._dirty = True
 
     def update_record(self, index: int, updated_record: DataFormat) -> bool:
         """
         Метод обновления записи.
+        Изменение попадает в файл при вызове flush() или при завершении работы.
 
         :param index: Индекс записи.
         :param updated_record: Обновленная запись.
         :return:
             bool: Результат выполнения операции (успешно или нет).
         """
-        records = self.read_file()
+        records = self._get_cached()
         if 0 <= index < len(records): # Если такая запись есть, то ее заменить
-            records[index] = updated_record.dictionary()
-            self.save_records(records)
+            self._unindex_record(index, records[index])
+            records[index] = updated_record
+            self._index_record(index, records[index])
+            self._recount_totals()
+            self._dirty = True
             return True
         else:
             return False
 
-    def search_records(self, search_criteria: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def search_records(self, search_criteria: Dict[str, Any]) -> List[DataFormat]:
         """
         Метод для поиска записей по критериям.
 
         :param search_criteria: Критерии поиска.
         :return:
-            List[Dict[str, Any]]: Список найденных записей.
+            List[DataFormat]: Список найденных записей.
         """
         records = self.read_file()
-        matching_records = []
-        for record in records:
-            if all(record[key] == value for key, value in search_criteria.items()):
-                matching_records.append(record)
-        return matching_records
+        if search_criteria and all(key in self.INDEXED_FIELDS for key in search_criteria):
+            # Все поля проиндексированы: пересекаем множества номеров записей вместо перебора списка
+            positions = None
+            for key, value in search_criteria.items():
+                found = self._index.get((key, value), set())
+                positions = found if positions is None else positions & found
+                if not positions:
+                    return []
+            return [records[position] for position in sorted(positions)]
+        if not search_criteria:
+            return list(records)
+        keys = tuple(search_criteria)
+        target = tuple(search_criteria[key] for key in keys)
+        getter = operator.attrgetter(*keys)
+        if len(keys) == 1:  # attrgetter с одним полем возвращает значение, а не кортеж
+            target = target[0]
+        return [record for record in records if getter(record) == target]  # Отбор записей за один проход по списку в памяти
 
 
 class UserInterface:
@@ -123,14 +337,38 @@ class UserInterface:
         print('Текущий доход:', income)
         print('Текущий расход:', expenses)
 
-    def display_records(self, records: List[Dict[str, Any]]) -> None:
+    def display_records(self, records: List[DataFormat]) -> None:
         """
         Метод для вывода записей на консоль.
 
-        :param records: Список словарей с данными.
+        :param records: Список записей.
         """
-        for record in records:
-            print('Дата:', record['date'], 'Категория:', record['category'], 'Сумма:', record['amount'], 'Описание:', record['description'])
+        if not records:
+            return
+        # Все строки собираются в один текст и выводятся одной записью вместо print() на каждую запись
+        sys.stdout.write('\n'.join(
+            f"Дата: {record.date} Категория: {record.category} Сумма: {record.amount} Описание: {record.description}"
+            for record in records) + '\n')
+
+    def _prompt(self, prompt: str, parse: Callable[[str], Any], validate: Callable[[Any], bool], error: str) -> Any:
+        """
+        Метод для ввода значения с повтором, пока оно не пройдет проверку.
+
+        :param prompt: Текст приглашения к вводу.
+        :param parse: Функция преобразования введенной строки.
+        :param validate: Функция проверки преобразованного значения.
+        :param error: Сообщение о некорректном вводе.
+        :return:
+            Any: Преобразованное значение.
+        """
+        while True:
+            try:
+                value = parse(input(prompt))
+                if validate(value):
+                    return value
+            except ValueError:  # Например, float() от строки, которая не является числом
+                pass
+            print(error)
 
     def input_record(self) -> DataFormat:
         """
@@ -141,22 +379,11 @@ class UserInterface:
         """
         date= input('Введите дату (гггг-мм-дд): ')
 
-        while True:
-            category_choice = input('Введите число для выбора категории (1 - Доход, 2 - Расход): ')
-            if category_choice == '1':
-                category = 'Доход'
-                break
-            elif category_choice == '2':
-                category = 'Расход'
-                break
-            else:
-                    print('Некорректный ввод. Пожалуйста, введите 1 для Дохода или 2 для Расхода.')
-        while True:
-            amount = float(input('Введите сумму: '))
-            if amount >= 0:
-                break
-            else:
-                print('Некорректный ввод. Введите положительное число')
+        category = self._prompt('Введите число для выбора категории (1 - Доход, 2 - Расход): ',
+                                {'1': _INCOME, '2': _EXPENSE}.get, lambda value: value is not None,
+                                'Некорректный ввод. Пожалуйста, введите 1 для Дохода или 2 для Расхода.')
+        amount = self._prompt('Введите сумму: ', float, lambda value: value >= 0,
+                              'Некорректный ввод. Введите положительное число')
         description = input('Введите описание: ')
         return DataFormat(date, category, amount, description)
 
@@ -169,6 +396,7 @@ class UserInterface:
         """
         date = input('Введите дату для поиска (гггг-мм-дд): ')
         category = input('Введите категорию для поиска (Доход/Расход): ')
+        category = _CATEGORIES.get(category, category)
         return {'date': date, 'category': category}
 
 
@@ -182,6 +410,13 @@ class Main:
         """
         self.data_manager = data_manager
         self.ui = ui
+        self._actions: Dict[str, Callable[[], None]] = {  # Таблица действий: выбор пользователя -> метод
+            '1': self.display_balance,
+            '2': self.add_record,
+            '3': self.display_records,
+            '4': self.changing_record,
+            '5': self.search_records,
+        }
 
     def start_application(self) -> None:
         """
@@ -190,28 +425,20 @@ class Main:
         while True:
             choice = input('Выберите действие: 1 - Вывод баланса, 2 - Добавление записи, 3 - Вывод записей, 4 - Изменение записи, 5 - Поиск по записям, 0- Выход ')
 
-            if choice == '1':
-                self.display_balance()
-            elif choice == '2':
-                self.add_record()
-            elif choice == '3':
-                self.display_records()
-            elif choice == '4':
-                self.changing_record()
-            elif choice == '5':
-                self.search_records()
-            elif choice == '0':
+            if choice == '0':
+                self.data_manager.flush()
                 break
-            else:
+            action = self._actions.get(choice)
+            if action is None:
                 print('Некорректный ввод')
+            else:
+                action()
 
     def display_balance(self) -> None:
         """
         Метод для вывода текущего баланса.
         """
-        records = self.data_manager.read_file()
-        income = sum(record['amount'] for record in records if record['category'] == 'Доход')
-        expenses = sum(record['amount'] for record in records if record['category'] == 'Расход')
+        income, expenses = self.data_manager.totals()
         balance = income - expenses
         self.ui.actual_balance(balance, income, expenses)
 
@@ -267,4 +494,5 @@ if __name__ == "__main__":
     data_manager = DataControl(filename)
     ui = UserInterface()
     app = Main(data_manager, ui)
-    app.start_application()
\ No newline at end of file
+    app.start_application()
+    data_manager.close()